@@ -59,7 +59,7 @@ def make_bundled_decisions(base, prefix, decisions, callback):
     if not any(dec.conflict for dec in decisions):
         # no conflicts, nothing to do
         for dec in decisions:
-            dec.pop('_level')
+            dec._level = 0
         return decisions
 
     resolved_base = resolve_path(base, prefix)
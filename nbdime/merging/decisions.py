@@ -4,6 +4,8 @@
 # Distributed under the terms of the Modified BSD License.
 
 import copy
+from functools import lru_cache
+from itertools import chain
 import nbformat
 
 import nbdime.log
@@ -11,10 +13,10 @@ from ..diff_format import (
     DiffOp, op_removerange, op_remove, op_patch, op_replace)
 from ..patching import patch
 from ..utils import (
-    r_is_int, star_path, join_path, is_prefix_array, find_shared_prefix)
+    star_path, join_path, is_prefix_array, find_shared_prefix)
 
 def as_list(x):
-    if x is None:
+    if x is None or type(x) is list:
         return x
     if isinstance(x, tuple):
         return list(x)
@@ -22,27 +24,66 @@ def as_list(x):
         return [x]
     return x
 
-class MergeDecision(dict):
+class MergeDecision(object):
     """For internal usage in nbdime library.
 
-    Minimal class providing attribute access to merge decision keys.
+    Minimal record class holding the fields of a merge decision.
 
-    Tip: If performance dictates, we can easily replace this
-    with a namedtuple during processing of diffs and convert
-    to dicts before any json conversions.
+    Uses fixed slots for fast attribute access during processing of
+    diffs. Use `to_dict` to convert to the JSON format of the spec.
     """
 
-    def __getattr__(self, name):
-        if name.startswith("__") and name.endswith("__"):
-            return self.__getattribute__(name)
-        return self[name]
-
-    def __setattr__(self, name, value):
-        self[name] = value
+    __slots__ = ("common_path", "action", "conflict", "local_diff",
+                 "remote_diff", "custom_diff", "strategy", "similar_insert",
+                 "_level")
+
+    def __init__(self, common_path, action, conflict=False, local_diff=None,
+                 remote_diff=None, custom_diff=None, strategy=None,
+                 similar_insert=None):
+        self.common_path = common_path
+        self.action = action
+        self.conflict = conflict
+        self.local_diff = local_diff
+        self.remote_diff = remote_diff
+        self.custom_diff = custom_diff
+        self.strategy = strategy
+        self.similar_insert = similar_insert
+        self._level = 0
+
+    def __repr__(self):
+        return "MergeDecision(%r)" % (self.to_dict(),)
+
+    def __eq__(self, other):
+        if not isinstance(other, MergeDecision):
+            return NotImplemented
+        return (self._level == other._level and
+                self.to_dict() == other.to_dict())
+
+    # Mutable, so not hashable (like a dict)
+    __hash__ = None
 
     def local_path(self):
-        level = self.get('_level', 0)
-        return (self.common_path or ())[level:]
+        return (self.common_path or ())[self._level:]
+
+    def to_dict(self):
+        """Convert to a dict following the merge format spec.
+
+        Optional fields are only included if set.
+        """
+        d = {
+            "common_path": self.common_path,
+            "action": self.action,
+            "conflict": self.conflict,
+            "local_diff": self.local_diff,
+            "remote_diff": self.remote_diff,
+        }
+        if self.custom_diff is not None:
+            d["custom_diff"] = self.custom_diff
+        if self.strategy is not None:
+            d["strategy"] = self.strategy
+        if self.similar_insert is not None:
+            d["similar_insert"] = self.similar_insert
+        return d
 
 
 class MergeDecisionBuilder(object):
@@ -71,9 +112,11 @@ class MergeDecisionBuilder(object):
         """
         # Remove fields 'strategy' used for internal decision making but not part of spec
         for d in self.decisions:
-            if "strategy" in d:
-                del d["strategy"]
-        return sorted(self.decisions, key=_sort_key, reverse=True)
+            d.strategy = None
+        # The key is computed once per decision, from its current path
+        return sorted(self.decisions,
+                      key=lambda d: _sort_key(d.common_path),
+                      reverse=True)
 
     def extend(self, decisions):
         if isinstance(decisions, MergeDecisionBuilder):
@@ -87,18 +130,19 @@ class MergeDecisionBuilder(object):
         return any(d.conflict for d in self.decisions)
 
     def add_decision(self, path, action, local_diff, remote_diff,
-                     conflict=False, strategy=None, **kwargs):
+                     conflict=False, strategy=None, custom_diff=None,
+                     similar_insert=None):
         """Add a decision to the builder with the specified properties.
 
         Ensures data types and paths are as they should be, before creating a
         MergeDecision and adding it to its internal store.
         """
         # Ensure path is immutable
-        if isinstance(path, list):
-            path = tuple(path)
-        else:
-            assert isinstance(path, tuple), 'decision paths should be tuples'
-        custom_diff = kwargs.pop("custom_diff", None)
+        if type(path) is not tuple:
+            if isinstance(path, list):
+                path = tuple(path)
+            else:
+                assert isinstance(path, tuple), 'decision paths should be tuples'
         # Ensure diffs are lists or None
         local_diff = as_list(local_diff)
         remote_diff = as_list(remote_diff)
@@ -106,21 +150,11 @@ class MergeDecisionBuilder(object):
         # Ensure paths are pushed out as far in tree as possible
         path, (local_diff, remote_diff, custom_diff) = \
             ensure_common_path(path, [local_diff, remote_diff, custom_diff])
-        if custom_diff is not None:
-            kwargs["custom_diff"] = custom_diff
-        # Store strategy field only if given
-        if strategy is not None:
-            kwargs["strategy"] = strategy
 
         # Finally store decision
         self.decisions.append(MergeDecision(
-            common_path=path,
-            conflict=conflict,
-            action=action,
-            local_diff=local_diff,
-            remote_diff=remote_diff,
-            **kwargs
-            ))
+            path, action, conflict, local_diff, remote_diff, custom_diff,
+            strategy, similar_insert))
 
     def base(self, path, local_diff, remote_diff, conflict=False, strategy=None):
         self.add_decision(
@@ -316,6 +350,33 @@ class MergeDecisionBuilder(object):
                 )
 
 
+def _common_patch_key(diffs):
+    """Get the key of the patch ops shared by a list of diffs.
+
+    Returns the key if all non-empty diffs are single patch operations
+    sharing the same key, and at least one diff is non-empty. Otherwise
+    returns None.
+    """
+    key = None
+    patch_op = DiffOp.PATCH
+    for d in diffs:
+        # Empty diffs can be skipped
+        if not d:
+            continue
+        # Check that we have only one op, which is a patch op
+        if len(d) != 1:
+            return None
+        e = d[0]
+        if e.op != patch_op:
+            return None
+        # Ensure all present diffs have the same key
+        if key is None:
+            key = e.key
+        elif key != e.key:
+            return None
+    return key
+
+
 def ensure_common_path(path, diffs):
     """Resolves common paths in a list of diffs.
 
@@ -324,11 +385,17 @@ def ensure_common_path(path, diffs):
     recursively, so a common chain of patches will be resolved as well.
     """
     assert isinstance(path, (tuple, list)), 'incorrect path type'
-    popped = _pop_path(diffs)
-    while popped:
-        path = path + (popped["key"],)
-        diffs = popped["diffs"]
-        popped = _pop_path(diffs)
+    copied = False
+    key = _common_patch_key(diffs)
+    while key is not None:
+        # Descend one level, without modifying the list passed by caller
+        if not copied:
+            diffs = list(diffs)
+            copied = True
+        for i, d in enumerate(diffs):
+            diffs[i] = d[0].diff if d else None
+        path = path + (key,)
+        key = _common_patch_key(diffs)
     return path, diffs
 
 
@@ -340,33 +407,20 @@ def _pop_path(diffs):
     as the inner diffs of the patch operations (in the same order as the passed
     diffs).
     """
-    key = None
-    popped_diffs = []
-    for d in diffs:
-        # Empty diffs can be skipped
-        if d is None or len(d) == 0:
-            popped_diffs.append(None)
-            continue
-        # Check that we have only one op, which is a patch op
-        if len(d) != 1 or d[0].op != DiffOp.PATCH:
-            return
-        # Ensure all present diffs have the same key
-        if key is None:
-            key = d[0].key
-        elif key != d[0].key:
-            return
-        # Ensure the sub diffs of all ops are suitable as outer layer
-        # if len(d[0].diff) > 1:
-        #    return
-        popped_diffs.append(d[0].diff)
+    # Check all diffs before building anything, as most diffs can't be popped
+    key = _common_patch_key(diffs)
     if key is None:
-        return
+        return None
+    popped_diffs = [d[0].diff if d else None for d in diffs]
     return {'key': key, 'diffs': popped_diffs}
 
 
 def push_path(path, diffs):
     """Wraps the diffs in patch operations matching path.
     """
+    if len(path) == 1:
+        # Common case, e.g. a line number in a string
+        return [op_patch(path[0], diffs)]
     for key in reversed(path):
         diffs = [op_patch(key, diffs)]
     return diffs
@@ -421,23 +475,24 @@ def push_patch_decision(decision, prefix):
     This is done by wrapping the diffs in nested patch ops.
     """
     dec = copy.copy(decision)
-    # We need to start with inner most key to nest correctly, so reverse:
-    for key in reversed(prefix):
-        if len(dec.common_path) == 0:
-            raise ValueError(
-                "Cannot remove key from empty decision path: %r, %r" %
-                (key, dec))
-        assert dec.common_path[-1] == key, "Key %r not at end of %r" % (
-            key, dec.common_path)
-        dec.common_path = dec.common_path[:-1]  # pop key
-        dec.local_diff = [op_patch(key, dec.local_diff)] if dec.local_diff else []
-        dec.remote_diff = [op_patch(key, dec.remote_diff)] if dec.remote_diff else []
-        if dec.action == "custom":
-            dec.custom_diff = [op_patch(key, dec.custom_diff)] if dec.custom_diff else []
+    n = len(prefix)
+    if n == 0:
+        return dec
+    if len(dec.common_path) < n:
+        raise ValueError(
+            "Cannot remove keys from too short decision path: %r, %r" %
+            (prefix, dec))
+    assert tuple(dec.common_path[-n:]) == tuple(prefix), (
+        "Keys %r not at end of %r" % (prefix, dec.common_path))
+    dec.common_path = dec.common_path[:-n]
+    dec.local_diff = push_path(prefix, dec.local_diff) if dec.local_diff else []
+    dec.remote_diff = push_path(prefix, dec.remote_diff) if dec.remote_diff else []
+    if dec.action == "custom":
+        dec.custom_diff = push_path(prefix, dec.custom_diff) if dec.custom_diff else []
     return dec
 
 
-def _sort_key(k):
+def _sort_key(path):
     """Sort key for common paths. Ensures the correct order for processing,
     without having to care about offsetting indices.
 
@@ -464,16 +519,18 @@ def _sort_key(k):
     SOFTWARE.
     """
     ret = []
-    for s in k.common_path:
-        if not isinstance(s, (int, str)):
-            s = s.decode("utf8")
-        if isinstance(s, str) and r_is_int.match(s):
-            s = int(s)
-        if isinstance(s, int):
+    for s in path or ():
+        if type(s) is int:
             ret.append(('', -s))
+        elif type(s) is str and (s.isdecimal() or
+                                 s[:1] in ('-', '+') and s[1:].isdecimal()):
+            # Integer strings, signed or not (as matched by star_path)
+            ret.append(('', -int(s)))
         else:
+            if isinstance(s, bytes):
+                s = s.decode("utf8")
             ret.append((s,))
-    return ret
+    return tuple(ret)
 
 
 def split_string_path(base, path):
@@ -494,20 +551,39 @@ def split_string_path(base, path):
     return path, ()
 
 
+# Clearing e.g. an outputs list means setting it to an empty list,
+# a metadata dict to an empty dict and a source string to an empty string
+_cleared_value_factories = {
+    list: list,
+    dict: dict,
+    nbformat.NotebookNode: dict,
+    str: str,
+}
+
+
 def make_cleared_value(value):
     "Make a new 'cleared' value of the right type."
-    if isinstance(value, list):
-        # Clearing e.g. an outputs list means setting it to an empty list
-        return []
-    elif isinstance(value, dict):
-        # Clearing e.g. a metadata dict means setting it to an empty dict
-        return {}
-    elif isinstance(value, str):
-        # Clearing e.g. a source string means setting it to an empty string
-        return ""
-    else:
+    factory = _cleared_value_factories.get(type(value))
+    if factory is None:
+        # Fall back to checking for subclasses of the container types
+        for t in (list, dict, str):
+            if isinstance(value, t):
+                return t()
         # Clearing anything else (atomic values) means setting it to None
         return None
+    return factory()
+
+
+@lru_cache(maxsize=4096)
+def _star_path(path):
+    "Cached version of `star_path`, for tuple paths."
+    return star_path(path)
+
+
+@lru_cache(maxsize=4096)
+def _join_path(path):
+    "Cached version of `join_path`, for tuple paths."
+    return join_path(path)
 
 
 def filter_decisions(pattern, decisions, exact=False):
@@ -515,10 +591,10 @@ def filter_decisions(pattern, decisions, exact=False):
     cutoff = len(pattern)
     for i, md in enumerate(decisions):
         path = md.common_path[:]
-        pop = _pop_path((md.local_diff, md.remote_diff, md.get('custom_diff')))
+        pop = _pop_path((md.local_diff, md.remote_diff, md.custom_diff))
         if pop:
             path = path + (pop["key"],)
-        starred_path = star_path(path)
+        starred_path = _star_path(tuple(path))
         if (exact and starred_path == pattern or
                 starred_path[:cutoff] == pattern):
             ret.append(i)
@@ -543,20 +619,31 @@ def filter_decisions(pattern, decisions, exact=False):
 #     "record-conflict",  # Valid for metadata only: produce new metadata with conflicts recorded for external inspection
 #     )
 
-def resolve_action(base, decision):
+def resolve_action(base, decision, copy_diffs=True):
+    """Get the diff that results from the action of a decision.
+
+    If `copy_diffs` is False, the diff of the decision itself might be
+    returned, in which case the caller must not modify the returned list.
+    """
     a = decision.action
 
     if a == "base":
         return []   # no-op
 
     elif a in ("local", "either"):
-        return copy.copy(decision.local_diff)
+        if copy_diffs:
+            return list(decision.local_diff)
+        return decision.local_diff
 
     elif a == "remote":
-        return copy.copy(decision.remote_diff)
+        if copy_diffs:
+            return list(decision.remote_diff)
+        return decision.remote_diff
 
     elif a == "custom":
-        return copy.copy(decision.custom_diff)
+        if copy_diffs:
+            return list(decision.custom_diff)
+        return decision.custom_diff
 
     elif a == "local_then_remote":
         return decision.local_diff + decision.remote_diff
@@ -565,7 +652,7 @@ def resolve_action(base, decision):
         return decision.remote_diff + decision.local_diff
 
     elif a in ("clear", "remove"):
-        key, = set(d.key for d in decision.local_diff + decision.remote_diff)
+        key, = set(d.key for d in chain(decision.local_diff, decision.remote_diff))
         if a == 'clear':
             return [op_replace(key, make_cleared_value(base[key]))]
         elif isinstance(base, (list, str)):
@@ -582,7 +669,7 @@ def resolve_action(base, decision):
             return [op_removerange(0, len(base))]
 
     elif a == "take_max":
-        key, = set(d.key for d in decision.local_diff + decision.remote_diff)
+        key, = set(d.key for d in chain(decision.local_diff, decision.remote_diff))
         #assert len(decision.local_diff) == 1 == len(decision.remote_diff)
         bval = base[key]
         lval = decision.local_diff[0].value if decision.local_diff else bval
@@ -597,22 +684,47 @@ def resolve_action(base, decision):
         raise NotImplementedError("The action \"%s\" is not defined" % a)
 
 
+def _shallow_clone(obj):
+    "Make a copy of a container, sharing its items with the original."
+    if isinstance(obj, dict):
+        return obj.copy()
+    elif isinstance(obj, list):
+        return obj[:]
+    return obj
+
+
 def apply_decisions(base, decisions):
     """Apply a list of merge decisions to base.
+
+    Base is not modified. Only the containers along the paths of the
+    decisions are copied; the final conversion with `nbformat.from_dict`
+    ensures that the returned object does not share containers with base.
     """
     from .strategies import combine_patches
 
-    merged = copy.deepcopy(base)
+    merged = _shallow_clone(base)
+    # Ids of containers in merged that are not shared with base, and
+    # can therefore be modified in place
+    cloned = {id(merged)}
+    # The chain of containers in merged resolved for the previous path,
+    # such that resolved_chain[i + 1] == resolved_chain[i][chain_keys[i]].
+    # Consecutive decisions typically share a path prefix, and can reuse
+    # the descent.
+    resolved_chain = [merged]
+    chain_keys = []
     prev_path = None
-    parent = None
-    last_key = None
     resolved = None
     diffs = []
     # clear_all actions should override other decisions on same obj, so
     # we need to track it
     clear_all_flag = False
+    prev_common_path = None
     for md in decisions:
-        path, line = split_string_path(merged, md.common_path)
+        # Consecutive decisions often share common_path, which then
+        # splits the same way
+        if md.common_path != prev_common_path:
+            prev_common_path = md.common_path
+            path, line = split_string_path(merged, prev_common_path)
         # We patch all decisions with the same path in one op
         if path == prev_path:
             # Same path as previous, collect entry
@@ -625,64 +737,81 @@ def apply_decisions(base, decisions):
                     clear_all_flag = True
                     # Clear any existing decisions!
                     diffs = []
-                ad = resolve_action(resolved, md)
+                ad = resolve_action(resolved, md, copy_diffs=False)
                 if line:
                     ad = push_path(line, ad)
-                diffs = combine_patches(diffs + ad)
+                diffs = combine_patches(chain(diffs, ad))
 
         else:
             # Different path, start a new collection
-            if prev_path is not None:
-                # First, apply previous diffs
-                if parent is None:
-                    # Operations on root create new merged object
-                    merged = patch(resolved, diffs)
-                else:
-                    # If not, overwrite entry in parent (which is an entry in
+            if prev_path is not None and diffs:
+                # First, apply previous diffs (if they are not a no-op)
+                resolved = patch(resolved, diffs)
+                cloned.add(id(resolved))
+                if chain_keys:
+                    # Overwrite entry in parent (which is an entry in
                     # merged). This is ok, as no paths should point to
                     # subobjects of the patched object
-                    parent[last_key] = patch(resolved, diffs)
+                    resolved_chain[-2][chain_keys[-1]] = resolved
+                else:
+                    # Operations on root create new merged object
+                    merged = resolved
+                resolved_chain[-1] = resolved
 
             prev_path = path
-            # Resolve path in base and output
-            resolved = merged
-            parent = None
-            last_key = None
-            for key in path:
-                parent = resolved
+            # Reuse the part of the previous descent shared with path
+            n = 0
+            limit = min(len(path), len(chain_keys))
+            while n < limit and path[n] == chain_keys[n]:
+                n += 1
+            del resolved_chain[n + 1:]
+            del chain_keys[n:]
+            # Resolve rest of path in base and output, copying every
+            # container we pass through that is still shared with base
+            resolved = resolved_chain[-1]
+            for key in path[n:]:
+                if id(resolved) not in cloned:
+                    resolved = _shallow_clone(resolved)
+                    resolved_chain[-2][chain_keys[-1]] = resolved
+                    resolved_chain[-1] = resolved
+                    cloned.add(id(resolved))
                 resolved = resolved[key]   # Should raise if key missing
-                last_key = key
-            diffs = resolve_action(resolved, md)
+                resolved_chain.append(resolved)
+                chain_keys.append(key)
+            diffs = resolve_action(resolved, md, copy_diffs=False)
             if line:
                 diffs = push_path(line, diffs)
             clear_all_flag = md.action == "clear_all"
     # Apply the last collection of diffs, if present (same as above)
-    if prev_path is not None:
-        if parent is None:
-            merged = patch(resolved, diffs)
+    if prev_path is not None and diffs:
+        resolved = patch(resolved, diffs)
+        if chain_keys:
+            resolved_chain[-2][chain_keys[-1]] = resolved
         else:
-            parent[last_key] = patch(resolved, diffs)
+            merged = resolved
 
     merged = nbformat.from_dict(merged)
     return merged
 
 
-def _merge_tree(tree, sorted_paths):
+def _merge_tree(tree, sorted_paths, start=0):
     """
     Merge a tree of diffs at varying path levels to one diff at their shared root
 
     Relies on the format specification about decision ordering to help
     simplify the process (deeper paths should come before its parent paths).
-    This is realized by the `sorted_paths` argument.
+    This is realized by the `sorted_paths` argument, of which only the
+    entries from index `start` are merged.
     """
     trunk = []
     root = None
-    for i in range(len(sorted_paths)):
+    n = len(sorted_paths)
+    for i in range(start, n):
         path = tree[sorted_paths[i]]['path']
         subdiffs = tree[sorted_paths[i]]['diff']
-        trunk = trunk + subdiffs
+        trunk.extend(subdiffs)
 
-        if i == len(sorted_paths) - 1:
+        if i == n - 1:
             nextPath = root
         else:
             nextPath = tree[sorted_paths[i + 1]]['path']
@@ -696,8 +825,8 @@ def _merge_tree(tree, sorted_paths):
         else:
             # We have started on a new trunk
             # Collect branches on the new trunk, and merge the trunks
-            newTrunk = _merge_tree(tree, sorted_paths[i + 1:])
-            nextPath = tree[sorted_paths[len(sorted_paths) - 1]]['path']
+            newTrunk = _merge_tree(tree, sorted_paths, i + 1)
+            nextPath = tree[sorted_paths[n - 1]]['path']
             prefix = find_shared_prefix(path, nextPath)
             pl = len(prefix) if prefix is not None else 0
             trunk = push_path(path[pl:], trunk) + push_path(nextPath[pl:], newTrunk)
@@ -721,9 +850,14 @@ def build_diffs(base, decisions, which):
     local = which == 'local'
     merged = which == 'merged'
 
+    prev_local_path = None
     for md in decisions:
-        # The path might include string line number, split those off:
-        path, line = split_string_path(base, md.local_path())
+        # The path might include string line number, split those off
+        # (reusing the split of the previous decision if on same path):
+        local_path = md.local_path()
+        if local_path != prev_local_path:
+            prev_local_path = local_path
+            path, line = split_string_path(base, local_path)
         # Get the diff for the current decision:
         if merged:
             subdiffs = resolve_action(base[path], md)
@@ -735,7 +869,7 @@ def build_diffs(base, decisions, which):
             if subdiffs is None:
                 continue
 
-        str_path = join_path(path)
+        str_path = _join_path(tuple(path))
         if str_path in tree:
             # Existing tree entry, simply add diffs to it
             if line:
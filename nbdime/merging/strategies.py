@@ -135,7 +135,7 @@ def bundle_decisions_by_index(base_path, decisions):
         else:
             # Removerange or addrange will have common_path
             # on list and key only in the diff entries
-            keys = set(e.key for e in chain(d.local_diff, d.remote_diff, d.get("custom_diff", ())))
+            keys = set(e.key for e in chain(d.local_diff, d.remote_diff, d.custom_diff or ()))
             assert len(keys) == 1
             key, = keys
         decisions_by_index[key].append(d)
@@ -533,7 +533,7 @@ def resolve_strategy_inline_recurse(path, base, decisions):
                 d.common_path != ('cells',)):
             decisions.decisions.append(d)
             continue
-        if d.get('similar_insert', None) is None:
+        if d.similar_insert is None:
             # Inserts not similar, cannot recurse. Markup block
             cells = make_inline_cell_conflict(base, d.local_diff, d.remote_diff)
             rdiff = []
@@ -629,7 +629,7 @@ def resolve_strategy_generic(path, decisions, strategy):
             # Resolve conflicts that aren't marked with an
             # already applied strategy. This applies to
             # at least the inline conflict strategies.
-            if d.conflict and not d.get("strategy"):
+            if d.conflict and not d.strategy:
                 d.action = action
                 d.conflict = False
     else:
@@ -699,7 +699,7 @@ def resolve_conflicted_decisions_strings(path, decisions, strategy):
 
     if strategy == "clear":
         for d in decisions:
-            if d.conflict and not d.get("strategy"):
+            if d.conflict and not d.strategy:
                 d.action = "clear"
                 d.conflict = False
     elif strategy == "inline-source":
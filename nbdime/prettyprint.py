@@ -901,17 +901,18 @@ def pretty_print_merge_decision(base, decision, config=DefaultConfig):
 
     diff_keys = ("diff", "local_diff", "remote_diff", "custom_diff", "similar_insert")
     exclude_keys = set(diff_keys) | {"common_path", "action", "conflict"}
-    pretty_print_dict(decision, exclude_keys, prefix, config)
+    decision_dict = decision.to_dict()
+    pretty_print_dict(decision_dict, exclude_keys, prefix, config)
 
     for dkey in diff_keys:
-        diff = decision.get(dkey)
+        diff = decision_dict.get(dkey)
 
         if (dkey == "remote_diff" and decision.action == "either" and
-                diff == decision.get("local_diff")):
+                diff == decision.local_diff):
             # Skip remote diff
             continue
         elif (dkey == "local_diff" and decision.action == "either" and
-                diff == decision.get("remote_diff")):
+                diff == decision.remote_diff):
             note = " (same as remote_diff)"
         elif dkey.startswith(decision.action):
             note = " (selected)"
@@ -9,9 +9,10 @@ import copy
 import re
 
 from nbdime import patch
-from nbdime.diff_format import op_patch
+from nbdime.diff_format import (
+    op_patch, op_add, op_remove, op_replace, op_addrange, op_removerange)
 from nbdime.merging.decisions import (
-    apply_decisions, ensure_common_path, MergeDecision)
+    apply_decisions, ensure_common_path, MergeDecision, MergeDecisionBuilder)
 
 from nbdime import diff
 
@@ -88,14 +89,14 @@ def create_decision_item(action=None, common_path="", conflict=False,
     else:
         pass
 
-    item = MergeDecision({
-            "action": action,
-            "common_path": common_path,
-            "conflict": conflict,
-            "custom_diff": custom_diff,
-            "local_diff": local_diff,
-            "remote_diff": remote_diff,
-        })
+    item = MergeDecision(
+            action=action,
+            common_path=common_path,
+            conflict=conflict,
+            custom_diff=custom_diff,
+            local_diff=local_diff,
+            remote_diff=remote_diff,
+        )
     return item
 
 
@@ -144,6 +145,59 @@ def test_apply_merge_on_dicts():
 
     assert remote == apply_decisions(base, merge_decisions)
 
+
+def _nested_decisions(base):
+    b = MergeDecisionBuilder()
+    # Root level patch
+    b.local((), [op_add("new", {"n": [1]})], None)
+    # Deep patches of dict and list
+    b.remote(("items", 0, "meta"), [op_remove("k")], [op_replace("k", "w")])
+    b.local_then_remote(("items", 0, "values"),
+                        [op_addrange(0, [0])], [op_removerange(2, 1)])
+    # Patches of lines in a string
+    b.local(("items", 1, "source", 1), [op_addrange(0, "#")], None)
+    b.remote(("items", 1, "source", 2),
+             None, [op_removerange(0, 1), op_addrange(1, "!")])
+    return b.validated(base)
+
+
+def _decision_diffs(decisions):
+    return [(d.local_diff, d.remote_diff, d.custom_diff) for d in decisions]
+
+
+def test_apply_merge_does_not_modify_input():
+    base = {
+        "items": [
+            {"meta": {"k": "v", "other": [1, 2]}, "values": [1, 2, 3]},
+            {"source": "a\nb\nc\n", "meta": {}},
+        ],
+        "top": {"x": 1},
+    }
+    base_copy = copy.deepcopy(base)
+    decisions = _nested_decisions(base)
+    # Decision diffs are passed on to patching without copying
+    diffs_copy = copy.deepcopy(_decision_diffs(decisions))
+
+    merged = apply_decisions(base, decisions)
+    assert merged == {
+        "new": {"n": [1]},
+        "items": [
+            {"meta": {"k": "w", "other": [1, 2]}, "values": [0, 1, 2]},
+            {"source": "a\n#b\n!\n", "meta": {}},
+        ],
+        "top": {"x": 1},
+    }
+    assert base == base_copy
+    assert _decision_diffs(decisions) == diffs_copy
+
+    # Merged result should not share any containers with the input
+    merged["new"]["n"].append(2)
+    merged["items"][0]["meta"]["other"].append(3)
+    merged["items"][1]["meta"]["m"] = 1
+    merged["top"]["y"] = 2
+    assert base == base_copy
+    assert _decision_diffs(decisions) == diffs_copy
+
 # merge decisions with common path "cells" can modify cells/* indices
 # merge decisions with common path "cells/*" only edit exactly one of the cells/* objects
 # applying cells/* before cells means editing first, no indices modified, then moving things around
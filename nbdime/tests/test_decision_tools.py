@@ -4,13 +4,16 @@
 # Distributed under the terms of the Modified BSD License.
 
 
+import copy
 
 import pytest
 
+import nbdime.merging.generic
+from nbdime import decide_merge
 from nbdime.diff_format import op_remove, op_patch
 from nbdime.merging.decisions import (
     ensure_common_path, MergeDecisionBuilder, MergeDecision,
-    pop_patch_decision, build_diffs,
+    pop_patch_decision, build_diffs, _sort_key,
 )
 
 
@@ -152,3 +155,53 @@ def test_build_diffs_sorted():
     assert diff[2] == op_patch('b', [op_remove('j')])
     assert diff[3] == op_remove('a')
 
+
+def test_build_diffs_list_path():
+    md = MergeDecision(
+        common_path=['a'],
+        action="local",
+        local_diff=[op_remove('b')],
+        remote_diff=None,
+    )
+    base = dict(a=dict(b=1))
+    diff = build_diffs(base, [md], 'local')
+    assert diff == [op_patch('a', [op_remove('b')])]
+
+
+def test_validated_sorts_on_current_path():
+    b = MergeDecisionBuilder()
+    b.onesided(('a',), [op_remove('x')], None)
+    b.onesided(('b',), [op_remove('y')], None)
+    # Move first decision after the other by reassigning its path
+    b.decisions[0].common_path = ('c',)
+    decisions = b.validated({})
+    assert [d.common_path for d in decisions] == [('c',), ('b',)]
+
+
+def test_sort_key_integer_strings():
+    assert _sort_key((3, '4', '-1', '+2', 'a')) == (
+        ('', -3), ('', -4), ('', 1), ('', -2), ('a',))
+
+
+def test_merge_decision_equality():
+    b = MergeDecisionBuilder()
+    b.onesided(("a",), [op_remove("x")], None)
+    b.onesided(("a",), [op_remove("x")], None)
+    b.onesided(("a",), [op_remove("y")], None)
+    d0, d1, d2 = b.decisions
+    assert d0 == d1
+    assert not (d0 != d1)
+    assert d0 != d2
+    d1._level = 1
+    assert d0 != d1
+
+
+def test_merge_strings_duplicate_decisions_logged(monkeypatch, caplog, reset_log):
+    def duplicate_decisions(path, decisions, strategy):
+        # Equal, but distinct decision objects
+        decisions.decisions.extend([copy.copy(d) for d in decisions.decisions])
+    monkeypatch.setattr(
+        nbdime.merging.generic, "resolve_conflicted_decisions_strings",
+        duplicate_decisions)
+    decide_merge({"s": "a\nb\n"}, {"s": "a\nc\n"}, {"s": "a\nd\n"})
+    assert "Found duplicated decisions" in caplog.text
@@ -191,7 +191,7 @@ def _check(partial, expected_partial, decisions, expected_conflicts):
     for e, d in zip(expected_conflicts, conflicts):
         # Only check keys specified in expectation value
         for k in sorted(e.keys()):
-            assert d[k] == e[k]
+            assert getattr(d, k) == e[k]
 
 
 def _check_sources(base, local, remote, expected_partial, expected_conflicts, merge_args=None, ignore_cell_ids=False):
@@ -916,7 +916,7 @@ def test_only_sources(db, reset_notebook_diff, reset_log):
 
     assert len(decisions) > 0
     for d in decisions:
-        path = d['common_path']
+        path = d.common_path
         # Still have some decisions on cell root, so avoid with len == 2 check
         assert len(path) == 2 or path[2] == 'source'
 
@@ -934,7 +934,7 @@ def test_only_outputs(db, reset_notebook_diff):
 
     assert len(decisions) > 0
     for d in decisions:
-        path = d['common_path']
+        path = d.common_path
         # Still have some decisions on cell root, so avoid with len == 2 check
         assert len(path) == 2 or path[2] == 'outputs'
 
@@ -952,7 +952,7 @@ def test_only_metadata(db, reset_notebook_diff):
 
     assert len(decisions) > 0
     for d in decisions:
-        path = d['common_path']
+        path = d.common_path
         # Still have some decisions on cell root, so avoid with len == 2 check
         assert (
             len(path) == 2 or
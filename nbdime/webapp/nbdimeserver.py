@@ -263,7 +263,7 @@ class ApiMergeHandler(NbdimeHandler, APIHandler):
 
         data = {
             'base': base_nb,
-            'merge_decisions': decisions
+            'merge_decisions': [d.to_dict() for d in decisions]
             }
         self.finish(data)
 